@@ -1,45 +1,87 @@
 # config.py - Todas as configurações centralizadas
 import os
-from typing import List, Dict, Any, Tuple
+import re
+import sys
+import logging
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import List, Dict, Any, Tuple, Mapping, Optional
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# Cache do .env já interpretado: chave (caminho absoluto, mtime_ns, tamanho) -> variáveis
+_ENV_CACHE: Dict[str, Any] = {'key': None, 'vals': {}}
+
+# Linha "CHAVE=valor" (ignora comentários e linhas vazias) numa única varredura
+_ENV_RE = re.compile(rb'^[ \t]*([^#=\s][^=\n]*?)[ \t]*=[ \t]*(.*?)[ \t\r]*$', re.M)
 
 # Carrega variáveis do arquivo .env se existir
-def carregar_env():
-    """Carrega variáveis do arquivo .env"""
+def carregar_env(caminho: str = '.env') -> bool:
+    """Carrega variáveis do arquivo .env (reaproveita o cache se o arquivo não mudou)"""
     try:
-        with open('.env', 'r') as f:
-            for linha in f:
-                linha = linha.strip()
-                if linha and not linha.startswith('#') and '=' in linha:
-                    chave, valor = linha.split('=', 1)
-                    os.environ[chave.strip()] = valor.strip()
+        st = os.stat(caminho)
     except FileNotFoundError:
-        print("⚠️  Arquivo .env não encontrado. Usando configurações padrão.")
+        return False
+
+    chave_cache = (os.path.abspath(caminho), st.st_mtime_ns, st.st_size)
+    if _ENV_CACHE['key'] != chave_cache:
+        dados = Path(caminho).read_bytes()
+        _ENV_CACHE['vals'] = {
+            m.group(1).decode(): m.group(2).decode()
+            for m in _ENV_RE.finditer(dados)
+        }
+        _ENV_CACHE['key'] = chave_cache
+
+    os.environ.update(_ENV_CACHE['vals'])
+    return True
 
 # Carrega as variáveis
-carregar_env()
+_env_encontrado = carregar_env()
 
 # =============================================================================
 # CONFIGURAÇÕES PRINCIPAIS
 # =============================================================================
 
-TELEGRAM_CONFIG = {
-    'bot_token': os.getenv('BOT_TOKEN', 'SEU_BOT_TOKEN_AQUI'),
-    'chat_id': os.getenv('CHAT_ID', 'SEU_CHAT_ID_AQUI'),
+# Diagnóstico detalhado na importação (CONFIG_DEBUG=1 no .env ou ambiente)
+DEBUG_CONFIG: bool = os.getenv('CONFIG_DEBUG', '0') == '1'
+
+# Lidos uma única vez na importação
+BOT_TOKEN: str = os.getenv('BOT_TOKEN', 'SEU_BOT_TOKEN_AQUI')
+CHAT_ID: str = os.getenv('CHAT_ID', 'SEU_CHAT_ID_AQUI')
+
+TELEGRAM_CONFIG: Mapping[str, Any] = MappingProxyType({
+    'bot_token': BOT_TOKEN,
+    'chat_id': CHAT_ID,
     'ativado': True
-}
+})
 
 # Moedas para monitorar
-MOEDAS: List[str] = [
+MOEDAS: Tuple[str, ...] = (
     "BTCUSDT", "ETHUSDT", "ADAUSDT", "SOLUSDT", 
     "AVAXUSDT", "DOGEUSDT", "XRPUSDT"
-]
+)
 
 # Timeframe para análise
 TIMEFRAME: str = '4h'  # 1m, 5m, 15m, 30m, 1h, 2h, 4h, 6h, 8h, 12h, 1d
 
+# Duração do candle em ms (timeframes alinhados ao epoch UTC; None = não suportado)
+_TIMEFRAMES_MS: Dict[str, int] = {
+    '1m': 60_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '6h': 21_600_000,
+    '8h': 28_800_000, '12h': 43_200_000, '1d': 86_400_000
+}
+TIMEFRAME_MS: Optional[int] = _TIMEFRAMES_MS.get(TIMEFRAME)
+
 # Intervalo entre verificações (segundos)
 INTERVALO_VERIFICACAO: int = 300  # 5 minutos
 
+# Validade de um alerta ativo (segundos): um candle inteiro do timeframe
+ALERTA_TTL: int = TIMEFRAME_MS // 1000 if TIMEFRAME_MS else 4 * 3600
+
 # Força mínima do cruzamento - MA principal deve estar X% acima/abaixo das MAs de referência
 FORCA_MINIMA_CRUZAMENTO: float = 0.02  # 2% - força mínima para validar o cruzamento
 
@@ -54,6 +96,21 @@ MAS_DISPONIVEIS: Dict[str, int] = {
     'MA_100': 100, 'MA_150': 150, 'MA_200': 200
 }
 
+# Tabela indexada das MAs (nomes em tupla, períodos em array contíguo)
+_MA_NAMES: Tuple[str, ...] = ()
+_MA_PERIODS: np.ndarray = np.empty(0, dtype=np.int64)
+MA_INDEX: Dict[str, int] = {}
+
+def _montar_tabela_mas() -> None:
+    """(Re)constrói a tabela indexada a partir de MAS_DISPONIVEIS"""
+    global _MA_NAMES, _MA_PERIODS, MA_INDEX
+    _MA_NAMES = tuple(MAS_DISPONIVEIS)
+    _MA_PERIODS = np.array([MAS_DISPONIVEIS[nome] for nome in _MA_NAMES], dtype=np.int64)
+    _MA_PERIODS.setflags(write=False)
+    MA_INDEX = {nome: i for i, nome in enumerate(_MA_NAMES)}
+
+_montar_tabela_mas()
+
 # =============================================================================
 # CONFIGURAÇÕES DE ESTRATÉGIAS DE CRUZAMENTO
 # =============================================================================
@@ -72,6 +129,7 @@ ESTRATEGIA_ATUAL = {
 # PROCESSAMENTO AUTOMÁTICO DA ESTRATÉGIA
 # =============================================================================
 
+@lru_cache(maxsize=1)
 def get_mas_necessarias() -> Dict[str, int]:
     """Retorna apenas as MAs necessárias para a estratégia atual"""
     mas_necessarias = {}
@@ -88,6 +146,11 @@ def get_mas_necessarias() -> Dict[str, int]:
     
     return mas_necessarias
 
+@lru_cache(maxsize=1)
+def get_ma_indices() -> Tuple[int, ...]:
+    """Retorna os índices (em _MA_PERIODS) das MAs da estratégia atual"""
+    return tuple(MA_INDEX[nome] for nome in get_mas_necessarias())
+
 # MAs que serão calculadas (baseado na estratégia escolhida)
 PERIODOS_MA = get_mas_necessarias()
 
@@ -96,16 +159,75 @@ PERIODOS_MA = get_mas_necessarias()
 # =============================================================================
 
 # URL da API
-BINANCE_API: Dict[str, str] = {
-    'base_url': 'https://fapi.binance.com',
-    'klines_endpoint': '/fapi/v1/klines'
-}
+BASE_URL: str = 'https://fapi.binance.com'
+KLINES_ENDPOINT: str = '/fapi/v1/klines'
+TICKER_PRICE_ENDPOINT: str = '/fapi/v1/ticker/price'  # ← Preço atual de todos os símbolos numa chamada
+PING_ENDPOINT: str = '/fapi/v1/ping'  # ← Usado para aquecer DNS/TLS na inicialização
+
+BINANCE_API: Mapping[str, str] = MappingProxyType({
+    'base_url': BASE_URL,
+    'klines_endpoint': KLINES_ENDPOINT,
+    'ticker_price_endpoint': TICKER_PRICE_ENDPOINT,
+    'ping_endpoint': PING_ENDPOINT
+})
 
 # Configurações da requisição
-REQUEST_CONFIG: Dict[str, Any] = {
-    'timeout': 30,  # ← Tempo limite para requisição (10 segundos)
-    'limit_candles': 100
-}
+TIMEOUT: int = 30  # ← Tempo limite para requisição (30 segundos)
+LIMIT_CANDLES: int = 100
+
+REQUEST_CONFIG: Mapping[str, Any] = MappingProxyType({
+    'timeout': TIMEOUT,
+    'limit_candles': LIMIT_CANDLES
+})
+
+# Concorrência e orçamento de peso da API (X-MBX-USED-WEIGHT-1M)
+MAX_WORKERS: int = 8           # ← Máximo de requisições simultâneas
+PESO_LIMITE_MINUTO: int = 1200  # ← Peso máximo por minuto por IP
+PESO_ALERTA: int = 900          # ← A partir daqui, pausa até a virada do minuto
+
+# Plano de requisições pré-montado: (moeda, url de klines) por moeda
+URLS_PRONTAS: Tuple[Tuple[str, str], ...] = ()
+
+def _montar_urls() -> None:
+    """(Re)constrói URLS_PRONTAS a partir de MOEDAS"""
+    global URLS_PRONTAS
+    URLS_PRONTAS = tuple(
+        (moeda, f"{BASE_URL}{KLINES_ENDPOINT}?symbol={moeda}&interval={TIMEFRAME}&limit={LIMIT_CANDLES}")
+        for moeda in MOEDAS
+    )
+
+_montar_urls()
+
+def get_request_plan() -> Tuple[Tuple[str, str], ...]:
+    """Retorna as URLs de klines já montadas para cada moeda"""
+    return URLS_PRONTAS
+
+# =============================================================================
+# CONFIGURAÇÃO CONSOLIDADA (IMUTÁVEL)
+# =============================================================================
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Snapshot imutável da configuração - substituído por inteiro a cada mudança"""
+    moedas: Tuple[str, ...]
+    periodos_ma: Tuple[Tuple[str, int], ...]
+    timeframe: str
+    intervalo_verificacao: int
+    forca_minima_cruzamento: float
+    urls_klines: Tuple[Tuple[str, str], ...]
+
+CFG = Config(
+    moedas=MOEDAS,
+    periodos_ma=tuple(PERIODOS_MA.items()),
+    timeframe=TIMEFRAME,
+    intervalo_verificacao=INTERVALO_VERIFICACAO,
+    forca_minima_cruzamento=FORCA_MINIMA_CRUZAMENTO,
+    urls_klines=URLS_PRONTAS
+)
+
+def get_config() -> Config:
+    """Retorna o snapshot atual (leia os campos dele em vez das globais soltas)"""
+    return CFG
 
 # =============================================================================
 # CONFIGURAÇÕES DE DISPLAY
@@ -118,7 +240,7 @@ FORMATO_PRECO: Dict[str, Any] = {
 }
 
 # Cores e símbolos para alertas
-SIMBOLOS: Dict[str, str] = {
+SIMBOLOS: Mapping[str, str] = MappingProxyType({
     'alta': '🟢',
     'baixa': '🔴',
     'neutro': '✅',
@@ -127,7 +249,7 @@ SIMBOLOS: Dict[str, str] = {
     'config': '⚙️',
     'stop': '✋',
     'resumo': '📊'
-}
+})
 
 # =============================================================================
 # LOGGING
@@ -139,18 +261,31 @@ LOGGING_CONFIG: Dict[str, Any] = {
     'datefmt': '%H:%M:%S'
 }
 
+# Configuração do logging (antes de qualquer mensagem de boot)
+logging.basicConfig(
+    level=getattr(logging, LOGGING_CONFIG['level']),
+    format=LOGGING_CONFIG['format'],
+    datefmt=LOGGING_CONFIG['datefmt'],
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+
 # =============================================================================
 # FUNÇÕES AUXILIARES DE CONFIGURAÇÃO
 # =============================================================================
 
+@lru_cache(maxsize=1)
 def get_ma_names() -> List[str]:
     """Retorna os nomes das MAs configuradas"""
     return list(PERIODOS_MA.keys())
 
-def get_ma_periods() -> List[int]:
-    """Retorna os períodos das MAs configuradas"""
-    return list(PERIODOS_MA.values())
+@lru_cache(maxsize=1)
+def get_ma_periods() -> np.ndarray:
+    """Retorna os períodos das MAs configuradas (array int64 somente leitura, na ordem de get_ma_names)"""
+    periodos = _MA_PERIODS[list(get_ma_indices())]
+    periodos.setflags(write=False)
+    return periodos
 
+@lru_cache(maxsize=1)
 def get_estrategia_info() -> Dict[str, Any]:
     """Retorna informações da estratégia atual"""
     return {
@@ -184,9 +319,14 @@ def criar_nova_estrategia(nome: str, ma_principal: str, mas_referencia: List[str
 def adicionar_nova_ma(nome: str, periodo: int) -> None:
     """Adiciona uma nova MA ao banco disponível"""
     MAS_DISPONIVEIS[nome] = periodo
+    _montar_tabela_mas()
     # Recalcula as MAs necessárias
-    global PERIODOS_MA
+    global PERIODOS_MA, CFG
+    get_mas_necessarias.cache_clear()
+    get_ma_indices.cache_clear()
     PERIODOS_MA = get_mas_necessarias()
+    CFG = replace(CFG, periodos_ma=tuple(PERIODOS_MA.items()))
+    _limpar_caches()
 
 def listar_estrategias_exemplo() -> List[Dict[str, Any]]:
     """Lista exemplos de estratégias que podem ser usadas"""
@@ -200,41 +340,63 @@ def listar_estrategias_exemplo() -> List[Dict[str, Any]]:
 
 def update_moedas(novas_moedas: List[str]) -> None:
     """Atualiza a lista de moedas"""
-    global MOEDAS
-    MOEDAS = novas_moedas
-
+    global MOEDAS, CFG
+    MOEDAS = tuple(novas_moedas)
+    _montar_urls()
+    CFG = replace(CFG, moedas=MOEDAS, urls_klines=URLS_PRONTAS)
+    get_config_summary.cache_clear()
+
+def _limpar_caches() -> None:
+    """Invalida as visões memoizadas derivadas de PERIODOS_MA/MAS_DISPONIVEIS"""
+    get_ma_names.cache_clear()
+    get_ma_periods.cache_clear()
+    get_estrategia_info.cache_clear()
+    get_config_summary.cache_clear()
+    _validar_estrategia.cache_clear()
+
+@lru_cache(maxsize=1)
 def get_config_summary() -> Dict[str, Any]:
     """Retorna um resumo das configurações atuais"""
     estrategia = get_estrategia_info()
+    cfg = CFG
     return {
-        'moedas': len(MOEDAS),
-        'timeframe': TIMEFRAME,
-        'intervalo': INTERVALO_VERIFICACAO,
-        'limite_distancia': f"{FORCA_MINIMA_CRUZAMENTO*100:.1f}%",
+        'moedas': len(cfg.moedas),
+        'timeframe': cfg.timeframe,
+        'intervalo': cfg.intervalo_verificacao,
+        'limite_distancia': f"{cfg.forca_minima_cruzamento*100:.1f}%",
         'estrategia': estrategia['descricao'],
         'ma_principal': f"{estrategia['ma_principal']}({estrategia['periodo_principal']})",
         'mas_referencia': [f"{ma}({periodo})" for ma, periodo in zip(estrategia['mas_referencia'], estrategia['periodos_referencia'])],
-        'medias_moveis': PERIODOS_MA,
+        'medias_moveis': dict(cfg.periodos_ma),
         'mas_disponiveis': len(MAS_DISPONIVEIS)
     }
 
+def dump_config() -> None:
+    """Registra no log o resumo completo da configuração atual"""
+    resumo = get_config_summary()
+    log.info("⚙️  Configuração atual:\n" + "\n".join(f"   • {chave}: {valor}" for chave, valor in resumo.items()))
+
 # =============================================================================
 # VALIDAÇÃO AUTOMÁTICA
 # =============================================================================
 
 def validar_configuracao() -> Tuple[bool, str]:
     """Valida se a configuração atual é válida"""
-    ma_principal = ESTRATEGIA_ATUAL['ma_principal']
-    mas_referencia = ESTRATEGIA_ATUAL['mas_referencia']
-    
-    # Verifica se MA principal existe
-    if ma_principal not in MAS_DISPONIVEIS:
-        return False, f"MA principal '{ma_principal}' não encontrada em MAS_DISPONIVEIS"
-    
-    # Verifica se todas as MAs de referência existem
-    for ma_ref in mas_referencia:
-        if ma_ref not in MAS_DISPONIVEIS:
-            return False, f"MA de referência '{ma_ref}' não encontrada em MAS_DISPONIVEIS"
+    return _validar_estrategia(
+        ESTRATEGIA_ATUAL['ma_principal'],
+        tuple(ESTRATEGIA_ATUAL['mas_referencia'])
+    )
+
+@lru_cache(maxsize=1)
+def _validar_estrategia(ma_principal: str, mas_referencia: Tuple[str, ...]) -> Tuple[bool, str]:
+    """Validação memoizada por (ma_principal, mas_referencia)"""
+    # Verifica de uma vez se todas as MAs existem
+    faltando = {ma_principal, *mas_referencia} - frozenset(MAS_DISPONIVEIS)
+    if faltando:
+        if ma_principal in faltando:
+            return False, f"MA principal '{ma_principal}' não encontrada em MAS_DISPONIVEIS"
+        ma_ref = next(ma for ma in mas_referencia if ma in faltando)
+        return False, f"MA de referência '{ma_ref}' não encontrada em MAS_DISPONIVEIS"
     
     # Verifica se há pelo menos uma MA de referência
     if not mas_referencia:
@@ -242,22 +404,37 @@ def validar_configuracao() -> Tuple[bool, str]:
     
     # Verifica se as MAs têm períodos diferentes
     periodo_principal = MAS_DISPONIVEIS[ma_principal]
-    for ma_ref in mas_referencia:
-        if MAS_DISPONIVEIS[ma_ref] == periodo_principal:
-            return False, f"MA principal e MA de referência '{ma_ref}' têm o mesmo período ({periodo_principal})"
+    if periodo_principal in {MAS_DISPONIVEIS[ma] for ma in mas_referencia}:
+        ma_ref = next(ma for ma in mas_referencia if MAS_DISPONIVEIS[ma] == periodo_principal)
+        return False, f"MA principal e MA de referência '{ma_ref}' têm o mesmo período ({periodo_principal})"
     
     return True, "Configuração válida"
 
-# Validação automática na importação
+# Validação automática na importação - diagnósticos emitidos numa única mensagem
 _is_valid, _error_msg = validar_configuracao()
+_diagnosticos: List[str] = []
+_nivel_boot = logging.INFO
+
+if not _env_encontrado:
+    _diagnosticos.append("⚠️  Arquivo .env não encontrado. Usando configurações padrão.")
+    _nivel_boot = logging.WARNING
+
 if not _is_valid:
-    print(f"⚠️  ERRO DE CONFIGURAÇÃO: {_error_msg}")
-    print("Por favor, corrija a configuração em ESTRATEGIA_ATUAL")
+    _diagnosticos.append(f"⚠️  ERRO DE CONFIGURAÇÃO: {_error_msg}")
+    _diagnosticos.append("Por favor, corrija a configuração em ESTRATEGIA_ATUAL")
+    _nivel_boot = logging.WARNING
 else:
-    print(f"✅ Configuração válida: {ESTRATEGIA_ATUAL['descricao']}")
+    _diagnosticos.append(f"✅ Configuração válida: {ESTRATEGIA_ATUAL['descricao']}")
 
 # Verifica se credenciais do Telegram estão configuradas
-if TELEGRAM_CONFIG['bot_token'] == 'SEU_BOT_TOKEN_AQUI':
-    print("⚠️  Configure o BOT_TOKEN no arquivo .env")
-if TELEGRAM_CONFIG['chat_id'] == 'SEU_CHAT_ID_AQUI':
-    print("⚠️  Configure o CHAT_ID no arquivo .env")
\ No newline at end of file
+if BOT_TOKEN == 'SEU_BOT_TOKEN_AQUI':
+    _diagnosticos.append("⚠️  Configure o BOT_TOKEN no arquivo .env")
+    _nivel_boot = logging.WARNING
+if CHAT_ID == 'SEU_CHAT_ID_AQUI':
+    _diagnosticos.append("⚠️  Configure o CHAT_ID no arquivo .env")
+    _nivel_boot = logging.WARNING
+
+log.log(_nivel_boot, "\n".join(_diagnosticos))
+
+if DEBUG_CONFIG:
+    dump_config()
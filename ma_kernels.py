@@ -0,0 +1,61 @@
+# ma_kernels.py - Kernels numéricos das médias móveis (numba quando disponível)
+import sys
+import logging
+import numpy as np
+from typing import Tuple
+
+# numba só existe para CPython; no PyPy o JIT do próprio interpretador cobre o caminho NumPy
+if sys.implementation.name == 'cpython':
+    try:
+        from numba import njit
+    except ImportError:  # numba ausente: usa a versão NumPy
+        njit = None
+else:
+    njit = None
+
+def _last_two_smas_numpy(close: np.ndarray, periods: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """SMAs do penúltimo e do último candle para cada período (soma acumulada)"""
+    cs = np.concatenate(([0.0], np.cumsum(close)))
+    anterior = (cs[-2] - cs[-2 - periods]) / periods
+    atual = (cs[-1] - cs[-1 - periods]) / periods
+    return anterior, atual
+
+if njit is not None:
+    @njit(cache=True)
+    def _last_two_smas_numba(close, periods):
+        """Mesma saída da versão NumPy numa única passada compilada por período"""
+        n = close.shape[0]
+        anterior = np.empty(periods.shape[0])
+        atual = np.empty(periods.shape[0])
+        for j in range(periods.shape[0]):
+            periodo = periods[j]
+            # Soma móvel: janela do penúltimo candle, depois entra o último e sai o mais antigo
+            soma = 0.0
+            for i in range(n - 1 - periodo, n - 1):
+                soma += close[i]
+            anterior[j] = soma / periodo
+            soma += close[n - 1] - close[n - 1 - periodo]
+            atual[j] = soma / periodo
+        return anterior, atual
+
+    last_two_smas = _last_two_smas_numba
+else:
+    last_two_smas = _last_two_smas_numpy
+
+def aquecer_kernels(periodos: np.ndarray, tamanho: int) -> None:
+    """Compila (ou lê do cache) o kernel antes do primeiro ciclo e confere com a versão NumPy
+
+    Recebe o mesmo array de períodos usado pelo monitor (numba especializa por tipo,
+    inclusive somente leitura) e o tamanho da janela de fechamentos.
+    Se o kernel numba divergir, passa a usar a versão NumPy no lugar dele.
+    """
+    global last_two_smas
+    amostra = np.random.default_rng(0).uniform(1.0, 1000.0, tamanho)
+    obtido = last_two_smas(amostra, periodos)
+    if last_two_smas is _last_two_smas_numpy:
+        return
+    
+    esperado = _last_two_smas_numpy(amostra, periodos)
+    if not all(np.allclose(o, e, rtol=1e-12, atol=0.0) for o, e in zip(obtido, esperado)):
+        logging.warning("⚠️  Kernel numba divergiu da versão NumPy; usando NumPy")
+        last_two_smas = _last_two_smas_numpy
@@ -1,100 +1,144 @@
 # main.py - Versão FINAL corrigida para Fly.io
 import threading
+import logging
 import time
 import os
-import traceback
+from typing import Optional
 from monitor import MonitorBinanceFutures
-from config import get_config_summary
-from http.server import HTTPServer, BaseHTTPRequestHandler
-import json
+from string import Template
+from config import get_config, get_config_summary, get_estrategia_info
+from telegram_notifier import json_bytes
 
-class HealthHandler(BaseHTTPRequestHandler):
-    def log_message(self, format, *args):
-        # Suprimir logs HTTP para reduzir spam
-        pass
+# Página inicial, preenchida com a configuração atual e codificada uma única vez
+_INDEX_TEMPLATE = Template("""
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Monitor Crypto Online</title>
+    <meta charset="utf-8">
+    <style>
+        body { font-family: Arial; margin: 40px; background: #0a0a0a; color: #fff; }
+        .container { max-width: 600px; margin: 0 auto; }
+        .status { background: #1a1a1a; padding: 20px; border-radius: 10px; margin: 20px 0; }
+        .online { color: #00ff88; }
+        a { color: #00aaff; text-decoration: none; }
+        a:hover { text-decoration: underline; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>🚀 Monitor Crypto Online!</h1>
+        <div class="status">
+            <h2 class="online">✅ Sistema Funcionando</h2>
+            <p>📊 <a href="/health">Ver status detalhado (JSON)</a></p>
+            <p>🤖 Alertas via Telegram configurados</p>
+            <p>📈 Monitorando: $moedas</p>
+            <p>⏱️ Timeframe: $timeframe | Estratégia: $estrategia</p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+_INDEX_BYTES = _INDEX_TEMPLATE.substitute(
+    moedas=', '.join(moeda.removesuffix('USDT') for moeda in get_config().moedas),
+    timeframe=get_config().timeframe,
+    estrategia=get_estrategia_info()['descricao']
+).encode()
+
+def _montar_resposta(status: str, content_type: str, body: bytes) -> bytes:
+    """Monta a resposta HTTP completa (status + headers + corpo) num único buffer"""
+    headers = (
+        f"HTTP/1.1 {status}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Access-Control-Allow-Origin: *\r\n"
+        "\r\n"
+    )
+    return headers.encode() + body
+
+# Respostas estáticas pré-montadas
+_INDEX_RESPONSE = _montar_resposta('200 OK', 'text/html; charset=utf-8', _INDEX_BYTES)
+_NOT_FOUND_RESPONSE = _montar_resposta('404 Not Found', 'text/plain', b'404 - Not Found')
+
+# Cache da resposta do /health (evita recalcular o JSON a cada probe do Fly.io)
+HEALTH_CACHE_TTL = 5  # segundos
+_HEALTH_CACHE = {'ts': 0.0, 'response': b''}
+
+def _get_health_response() -> bytes:
+    """Retorna a resposta do /health, reconstruindo no máximo a cada HEALTH_CACHE_TTL"""
+    agora = time.monotonic()
+    if _HEALTH_CACHE['response'] and agora - _HEALTH_CACHE['ts'] < HEALTH_CACHE_TTL:
+        return _HEALTH_CACHE['response']
     
-    def do_GET(self):
-        try:
-            if self.path == '/health':
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                
-                try:
-                    config = get_config_summary()
-                    response = {
-                        "status": "online",
-                        "monitor": "running",
-                        "timestamp": time.strftime('%Y-%m-%d %H:%M:%S UTC'),
-                        "config": config
-                    }
-                except Exception as e:
-                    response = {
-                        "status": "online", 
-                        "monitor": "starting",
-                        "error": str(e),
-                        "timestamp": time.strftime('%Y-%m-%d %H:%M:%S UTC')
-                    }
-                
-                self.wfile.write(json.dumps(response, indent=2).encode())
+    try:
+        config = get_config_summary()
+        response = {
+            "status": "online",
+            "monitor": "running",
+            "timestamp": time.strftime('%Y-%m-%d %H:%M:%S UTC'),
+            "config": config
+        }
+    except Exception as e:
+        # Não guarda em cache: o próximo probe tenta novamente
+        response = {
+            "status": "online", 
+            "monitor": "starting",
+            "error": str(e),
+            "timestamp": time.strftime('%Y-%m-%d %H:%M:%S UTC')
+        }
+        return _montar_resposta('200 OK', 'application/json', json_bytes(response))
+    
+    resposta = _montar_resposta('200 OK', 'application/json', json_bytes(response))
+    _HEALTH_CACHE['ts'] = agora
+    _HEALTH_CACHE['response'] = resposta
+    return resposta
+
+def _criar_handler():
+    """Cria o handler HTTP (http.server só é importado quando o servidor sobe)"""
+    from http.server import BaseHTTPRequestHandler
+    
+    class HealthHandler(BaseHTTPRequestHandler):
+        # HTTP/1.1 permite que os probes reutilizem a conexão (todas as respostas têm Content-Length)
+        protocol_version = 'HTTP/1.1'
+        # Fecha conexões ociosas para não prender threads do servidor
+        timeout = 30
+        
+        def log_message(self, format, *args):
+            # Suprimir logs HTTP para reduzir spam
+            pass
+    
+        def do_GET(self):
+            try:
+                # Respostas pré-montadas: um único write por requisição
+                if self.path == '/health':
+                    self.wfile.write(_get_health_response())
             
-            elif self.path == '/':
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                html = """
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <title>Monitor Crypto Online</title>
-                    <meta charset="utf-8">
-                    <style>
-                        body { font-family: Arial; margin: 40px; background: #0a0a0a; color: #fff; }
-                        .container { max-width: 600px; margin: 0 auto; }
-                        .status { background: #1a1a1a; padding: 20px; border-radius: 10px; margin: 20px 0; }
-                        .online { color: #00ff88; }
-                        a { color: #00aaff; text-decoration: none; }
-                        a:hover { text-decoration: underline; }
-                    </style>
-                </head>
-                <body>
-                    <div class="container">
-                        <h1>🚀 Monitor Crypto Online!</h1>
-                        <div class="status">
-                            <h2 class="online">✅ Sistema Funcionando</h2>
-                            <p>📊 <a href="/health">Ver status detalhado (JSON)</a></p>
-                            <p>🤖 Alertas via Telegram configurados</p>
-                            <p>📈 Monitorando: BTC, ETH, ADA, SOL, AVAX, DOGE, XRP</p>
-                            <p>⏱️ Timeframe: 4h | Estratégia: MA7 vs MA25+MA99</p>
-                        </div>
-                    </div>
-                </body>
-                </html>
-                """
-                self.wfile.write(html.encode())
+                elif self.path == '/':
+                    self.wfile.write(_INDEX_RESPONSE)
             
-            else:
-                self.send_response(404)
-                self.send_header('Content-type', 'text/plain')
-                self.end_headers()
-                self.wfile.write(b'404 - Not Found')
+                else:
+                    self.wfile.write(_NOT_FOUND_RESPONSE)
                 
-        except Exception as e:
-            self.send_response(500)
-            self.send_header('Content-type', 'text/plain')
-            self.end_headers()
-            self.wfile.write(f'Error: {str(e)}'.encode())
+            except Exception as e:
+                self.wfile.write(_montar_resposta(
+                    '500 Internal Server Error', 'text/plain', f'Error: {str(e)}'.encode()
+                ))
+    
+    return HealthHandler
 
-def start_web_server():
-    """Inicia servidor web para manter a aplicação viva"""
+def start_web_server(pronto: Optional[threading.Event] = None):
+    """Inicia servidor web para manter a aplicação viva (sinaliza `pronto` após o bind)"""
     # Detecta a porta automaticamente (Fly.io usa variável PORT)
     port = int(os.getenv('PORT', 8080))
     
-    # Bind em todas as interfaces
-    server = HTTPServer(('0.0.0.0', port), HealthHandler)
+    from http.server import ThreadingHTTPServer
+    
+    # Bind em todas as interfaces; cada probe é atendido na sua própria thread,
+    # então um cliente lento não bloqueia os health checks seguintes
+    server = ThreadingHTTPServer(('0.0.0.0', port), _criar_handler())
     print(f"🌐 Servidor web iniciado na porta {port}")
+    if pronto is not None:
+        pronto.set()
     
     try:
         server.serve_forever()
@@ -106,12 +150,15 @@ def main():
     print("🚀 Iniciando aplicação no Fly.io...")
     
     # Inicia servidor web em thread separada
-    web_thread = threading.Thread(target=start_web_server, daemon=True)
+    servidor_pronto = threading.Event()
+    web_thread = threading.Thread(target=start_web_server, args=(servidor_pronto,), daemon=True)
     web_thread.start()
     
-    # Aguarda servidor iniciar
-    time.sleep(3)
-    print("✅ Servidor web iniciado com sucesso")
+    # Aguarda apenas até o bind do servidor
+    if servidor_pronto.wait(timeout=2.0):
+        print("✅ Servidor web iniciado com sucesso")
+    else:
+        print("⚠️  Servidor web não confirmou inicialização, seguindo com o monitor")
     
     # Inicia o monitor com tratamento de erro robusto
     while True:
@@ -126,8 +173,8 @@ def main():
             
         except Exception as e:
             print(f"❌ Erro no monitor: {e}")
-            print("📝 Detalhes do erro:")
-            traceback.print_exc()
+            # O traceback é formatado pelo próprio logging, uma única vez
+            logging.exception("📝 Detalhes do erro:")
             
             print("🔄 Reiniciando monitor em 60 segundos...")
             time.sleep(60)
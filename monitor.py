@@ -1,42 +1,89 @@
 # monitor.py - Versão otimizada para Railway
 import requests
-import pandas as pd
-from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from datetime import datetime, timedelta, timezone
 import time
+import random
 import logging
-import sys
 import signal
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
 # Imports do Telegram e configurações
-from telegram_notifier import TelegramNotifier
+from telegram_notifier import TelegramNotifier, ler_json
+import ma_kernels
 from config import (
-    MOEDAS, TIMEFRAME, INTERVALO_VERIFICACAO, FORCA_MINIMA_CRUZAMENTO,
-    PERIODOS_MA, BINANCE_API, REQUEST_CONFIG,
-    FORMATO_PRECO, SIMBOLOS, LOGGING_CONFIG,
-    ESTRATEGIA_ATUAL, get_estrategia_info, TELEGRAM_CONFIG
+    TIMEFRAME_MS, ALERTA_TTL, FORCA_MINIMA_CRUZAMENTO,
+    BASE_URL, TICKER_PRICE_ENDPOINT, PING_ENDPOINT, TIMEOUT, LIMIT_CANDLES,
+    MAX_WORKERS, PESO_LIMITE_MINUTO, PESO_ALERTA,
+    FORMATO_PRECO, SIMBOLOS,
+    ESTRATEGIA_ATUAL, get_config, get_estrategia_info, get_ma_periods, TELEGRAM_CONFIG
 )
 
-# Configuração do logging otimizada para Railway
-logging.basicConfig(
-    level=getattr(logging, LOGGING_CONFIG['level']),
-    format=LOGGING_CONFIG['format'],
-    datefmt=LOGGING_CONFIG['datefmt'],
-    handlers=[logging.StreamHandler(sys.stdout)]
-)
+# Derivados das MAs configuradas, constantes durante o processo
+_NOMES_MA = tuple(nome for nome, _ in get_config().periodos_ma)
+_PERIODOS_MA_ARR = get_ma_periods()  # int64 somente leitura, alinhado com _NOMES_MA
+_MAX_MA_PERIOD = int(_PERIODOS_MA_ARR.max())
+_MAS_ORDENADAS = tuple(sorted(get_config().periodos_ma, key=lambda x: x[1]))
+
+# Fatores de força (1 ± k): FORCA_MINIMA_CRUZAMENTO é fixo durante o processo
+_FATOR_ALTA = 1.0 + FORCA_MINIMA_CRUZAMENTO
+_FATOR_BAIXA = 1.0 - FORCA_MINIMA_CRUZAMENTO
+
+# A cada quantos ciclos os alertas expirados são removidos de alertas_ativos
+_CICLOS_VARREDURA_ALERTAS = 12
+
+# Margem após o fechamento do candle para a Binance consolidar a kline
+_MARGEM_FECHAMENTO_MS = 500
+
+# Das 12 colunas de cada kline só são lidas estas duas
+_KLINE_OPEN_TIME = 0
+_KLINE_CLOSE = 4
+
+# Headers para parecer com browser normal (aplicados uma vez na sessão)
+_HTTP_HEADERS: Dict[str, str] = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'application/json',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+def _closes_kline(data: List[list]) -> np.ndarray:
+    """Extrai só a coluna de fechamento das klines como float64"""
+    return np.fromiter((float(row[_KLINE_CLOSE]) for row in data), dtype=np.float64, count=len(data))
+
+def _tempo_backoff(base: float, tentativa: int) -> float:
+    """Backoff exponencial (teto de 30s) com jitter para as moedas não retentarem juntas"""
+    return min(30, base * 2 ** tentativa) + random.uniform(0, 1.0)
+
+def _log_detalhado() -> bool:
+    """Stack trace só entra no log quando o nível DEBUG está ativo"""
+    return logging.getLogger().isEnabledFor(logging.DEBUG)
 
 class MonitorBinanceFutures:
     def __init__(self):
-        self.base_url = BINANCE_API['base_url']
+        # Snapshot da configuração: moedas, timeframe, intervalo e URLs vêm todos dele
+        self.cfg = get_config()
+        self.base_url = BASE_URL
+        self.urls_klines = dict(self.cfg.urls_klines)
         self.ultimos_alertas = {}
-        self.alertas_ativos = {}
+        # Alertas ativos por moeda: instante (time.monotonic) em que expiram
+        self.alertas_ativos: Dict[str, float] = {}
+        self.ciclos = 0
         self.running = True
+        # Relógio monotônico para tempo decorrido (imune a ajustes de NTP)
+        self.t0 = time.monotonic()
         
         # Carrega informações da estratégia
         self.estrategia = get_estrategia_info()
         self.ma_principal = self.estrategia['ma_principal']
         self.mas_referencia = self.estrategia['mas_referencia']
+        # Fixos durante o processo: evita montar listas a cada verificação
+        self._ma_ref_names = tuple(self.mas_referencia)
+        self._mas_necessarias = (self.ma_principal,) + self._ma_ref_names
         
         print(f"🎯 Estratégia carregada: {self.estrategia['descricao']}")
 
@@ -47,179 +94,278 @@ class MonitorBinanceFutures:
                 TELEGRAM_CONFIG['chat_id']
             )
 
+        # Requisições simultâneas: uma por worker do pool de threads
+        self.max_workers = min(MAX_WORKERS, len(self.cfg.moedas))
+
+        # Sessão HTTP persistente (keep-alive): todas as requisições vão para o mesmo host,
+        # então basta um pool com uma conexão reaproveitada por worker
+        self.session = requests.Session()
+        self.session.headers.update(_HTTP_HEADERS)
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.max_workers,
+            max_retries=0
+        )
+        self.session.mount('https://', adapter)
+
+        # Cache incremental de fechamentos por moeda: após a carga inicial só
+        # os candles novos (e o candle em aberto) são buscados a cada ciclo
+        self.tamanho_janela = _MAX_MA_PERIOD + 2
+        self.close_cache: Dict[str, np.ndarray] = {}
+        self.last_open_time: Dict[str, int] = {}
+        # Preços atuais de todas as moedas, buscados numa única chamada por ciclo
+        self.precos_lote: Dict[str, float] = {}
+
+        # Pool de threads reaproveitado entre ciclos (evita criar/destruir threads a cada verificação)
+        # limitado para não estourar o orçamento de peso da Binance em rajadas
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix='monitor'
+        )
+        # Instante (epoch) até o qual as requisições ficam pausadas (excesso de peso ou 451),
+        # compartilhado por todas as threads para que recuem juntas
+        self.pausa_api_ate = 0.0
+
         # Setup para encerramento gracioso
         signal.signal(signal.SIGTERM, self._signal_handler)
         signal.signal(signal.SIGINT, self._signal_handler)
 
+        self._aquecer_conexao()
+        ma_kernels.aquecer_kernels(_PERIODOS_MA_ARR, _MAX_MA_PERIOD + 1)
+
+    def _aquecer_conexao(self) -> None:
+        """Resolve DNS e abre a conexão TLS antes da primeira rajada de requisições"""
+        try:
+            self.session.get(f"{self.base_url}{PING_ENDPOINT}", timeout=5)
+        except Exception as e:
+            logging.warning(f"Falha ao aquecer conexão com a Binance: {str(e)}")
+
     def _signal_handler(self, signum, frame):
         """Handler para encerramento gracioso"""
         print(f"\n🛑 Recebido sinal {signum}. Encerrando...")
         self.running = False
 
     # Monitor com melhorias para Binance Futures
-    def buscar_dados(self, moeda: str) -> Optional[pd.DataFrame]:
-        """Busca dados de futuros da Binance com headers otimizados"""
-        max_retries = 3
+    def buscar_dados(self, moeda: str) -> Optional[Tuple[np.ndarray, int]]:
+        """Busca os fechamentos de futuros da Binance (incremental após a primeira carga)
+
+        Retorna (fechamentos em float64, open time em ms do último candle).
+        """
+        # Candle em aberto ainda é o mesmo do cache: basta o preço do lote, sem /klines
+        if self._atualizar_pelo_lote(moeda):
+            return self._fechamentos(moeda)
         
-        # Headers para parecer com browser normal
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'application/json',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        }
+        max_retries = 3
+        # Prazo para uma moeda não consumir o ciclo inteiro em retentativas
+        prazo = time.monotonic() + self.cfg.intervalo_verificacao * 0.8
         
         for tentativa in range(max_retries):
             try:
-                url = f"{self.base_url}{BINANCE_API['klines_endpoint']}"
-                params = {
-                    'symbol': moeda,
-                    'interval': TIMEFRAME,
-                    'limit': REQUEST_CONFIG['limit_candles']
-                }
+                # URL já contém symbol/interval/limit (montada em config)
+                url = self.urls_klines[moeda]
+                cache = self.close_cache.get(moeda)
+                
+                self._aguardar_pausa_api()
                 
-                response = requests.get(
-                    url, 
-                    params=params, 
-                    headers=headers,  # Adiciona headers
-                    timeout=REQUEST_CONFIG['timeout']
-                )
+                # Com cache, pede só a partir do último candle conhecido (ainda em aberto)
+                params = {'startTime': self.last_open_time[moeda]} if cache is not None else None
+                response = self.session.get(url, params=params, timeout=TIMEOUT)
+                self._registrar_peso(response)
                 
-                # Se deu 451, aguarda mais tempo
+                # Se deu 451, todas as moedas recuam juntas (a pausa é aplicada na próxima tentativa)
                 if response.status_code == 451:
-                    wait_time = (tentativa + 1) * 5  # 5s, 10s, 15s
-                    time.sleep(wait_time)
+                    wait_time = _tempo_backoff(5, tentativa)  # ~5s, 10s, 20s
+                    if time.monotonic() + wait_time > prazo:
+                        logging.error(f"Prazo do ciclo esgotado para {moeda} (451)")
+                        return None
+                    self._pausar_api(time.time() + wait_time)
                     continue
                     
                 response.raise_for_status()
+                data = ler_json(response)
+                if not data:
+                    if cache is None:
+                        return None
+                elif cache is None:
+                    self.close_cache[moeda] = _closes_kline(data)[-self.tamanho_janela:]
+                elif not self._aplicar_incremento(moeda, data, self.last_open_time[moeda]):
+                    # Lacuna maior que a janela: descarta o cache e recarrega tudo
+                    del self.close_cache[moeda]
+                    continue
                 
-                df = pd.DataFrame(response.json(), columns=[
-                    'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                    'close_time', 'quote_asset_volume', 'number_of_trades',
-                    'taker_buy_base', 'taker_buy_quote', 'ignore'
-                ])
-                
-                df['close'] = df['close'].astype(float)
-                df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-                
-                return df
+                if data:
+                    self.last_open_time[moeda] = int(data[-1][_KLINE_OPEN_TIME])
+                return self._fechamentos(moeda)
                 
             except Exception as e:
-                wait_time = (tentativa + 1) * 2  # Aumenta tempo de espera
+                wait_time = _tempo_backoff(2, tentativa)  # ~2s, 4s
                 logging.warning(f"Tentativa {tentativa + 1}/{max_retries} falhou para {moeda}: {str(e)}")
                 if tentativa == max_retries - 1:
                     logging.error(f"Erro final ao buscar {moeda}: {str(e)}")
+                elif time.monotonic() + wait_time > prazo:
+                    logging.error(f"Prazo do ciclo esgotado para {moeda}: {str(e)}")
+                    return None
                 else:
                     time.sleep(wait_time)
                         
         return None
 
-    def calcular_medias(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Calcula as médias móveis dinamicamente baseado na estratégia"""
-        for nome, periodo in PERIODOS_MA.items():
-            df[nome] = df['close'].rolling(periodo).mean()
+    def _fechamentos(self, moeda: str) -> Tuple[np.ndarray, int]:
+        """(fechamentos float64, open time do último candle) direto do cache, sem cópia"""
+        return self.close_cache[moeda], self.last_open_time[moeda]
+
+    def _atualizar_pelo_lote(self, moeda: str) -> bool:
+        """Atualiza o candle em aberto com o preço do lote, se ainda estiver no mesmo candle"""
+        cache = self.close_cache.get(moeda)
+        preco = self.precos_lote.get(moeda)
+        if cache is None or preco is None or not TIMEFRAME_MS:
+            return False
+        
+        agora_ms = int(time.time() * 1000)
+        if agora_ms - agora_ms % TIMEFRAME_MS != self.last_open_time[moeda]:
+            return False  # abriu candle novo: precisa do fechamento final via /klines
         
-        return df.iloc[-2:].copy()
+        cache[-1] = preco
+        return True
 
-    def detectar_cruzamento(self, dados_recentes: pd.DataFrame) -> tuple:
-        """Detecta cruzamentos com FORÇA suficiente baseado na estratégia configurada"""
-        if len(dados_recentes) < 2:
-            return None, None
-            
-        anterior = dados_recentes.iloc[0]
-        atual = dados_recentes.iloc[1]
+    def buscar_ultimos_precos_all(self) -> Dict[str, float]:
+        """Busca o preço atual de todos os símbolos numa única requisição"""
+        try:
+            self._aguardar_pausa_api()
+            response = self.session.get(f"{self.base_url}{TICKER_PRICE_ENDPOINT}", timeout=TIMEOUT)
+            self._registrar_peso(response)
+            response.raise_for_status()
+            return {item['symbol']: float(item['price']) for item in ler_json(response)}
+        except Exception as e:
+            logging.warning(f"Falha ao buscar preços em lote (usando /klines por moeda): {str(e)}")
+            return {}
+
+    def _registrar_peso(self, response: requests.Response) -> None:
+        """Lê o peso usado no minuto e agenda uma pausa se estiver perto do limite"""
+        peso = response.headers.get('X-MBX-USED-WEIGHT-1M')
+        if peso is None or int(peso) < PESO_ALERTA:
+            return
         
+        agora = time.time()
+        pausa_ate = agora - agora % 60 + 60  # janela de peso reinicia a cada minuto
+        if self._pausar_api(pausa_ate):
+            logging.warning(f"Peso da API em {peso}/{PESO_LIMITE_MINUTO}. Pausando requisições por {pausa_ate - agora:.0f}s")
+
+    def _pausar_api(self, ate: float) -> bool:
+        """Estende a pausa compartilhada até o instante `ate` (epoch); True se estendeu"""
+        if ate <= self.pausa_api_ate:
+            return False
+        self.pausa_api_ate = ate
+        return True
+
+    def _aguardar_pausa_api(self) -> None:
+        """Aguarda o fim da pausa compartilhada (peso esgotado ou bloqueio 451), se houver"""
+        espera = self.pausa_api_ate - time.time()
+        if espera > 0:
+            time.sleep(espera)
+
+    def _aplicar_incremento(self, moeda: str, data: List[list], ultimo_open_time: int) -> bool:
+        """Atualiza o candle em aberto e anexa os novos; False se não for possível emendar"""
+        if int(data[0][_KLINE_OPEN_TIME]) != ultimo_open_time or len(data) >= LIMIT_CANDLES:
+            return False
+        
+        cache = self.close_cache[moeda]
+        cache[-1] = float(data[0][_KLINE_CLOSE])
+        if len(data) > 1:
+            # Candles novos entram no fim e a janela é recortada ao tamanho máximo
+            self.close_cache[moeda] = np.concatenate((cache, _closes_kline(data[1:])))[-self.tamanho_janela:]
+        return True
+
+    def calcular_medias(self, closes: np.ndarray) -> Optional[Tuple[Dict[str, float], Dict[str, float]]]:
+        """Calcula as médias móveis do candle anterior e do atual baseado na estratégia"""
+        # Precisa de um candle a mais que a maior MA (para a MA do candle anterior)
+        if len(closes) < _MAX_MA_PERIOD + 1:
+            return None
+        
+        # Só a janela necessária entra no kernel (numba quando disponível, senão NumPy);
+        # lido do módulo porque aquecer_kernels() pode trocar o kernel
+        anterior_vals, atual_vals = ma_kernels.last_two_smas(closes[-(_MAX_MA_PERIOD + 1):], _PERIODOS_MA_ARR)
+        
+        anterior: Dict[str, float] = dict(zip(_NOMES_MA, anterior_vals.tolist()))
+        atual: Dict[str, float] = dict(zip(_NOMES_MA, atual_vals.tolist()))
+        
+        return anterior, atual
+
+    def detectar_cruzamento(self, anterior: Dict[str, float], atual: Dict[str, float]) -> tuple:
+        """Detecta cruzamentos com FORÇA suficiente baseado na estratégia configurada
+
+        Retorna (cruzamento_alta, cruzamento_baixa, tem_forca); tem_forca indica se a
+        MA principal está fora da faixa de força de alguma MA de referência.
+        """
         # Verifica se todas as MAs necessárias existem
-        mas_necessarias = [self.ma_principal] + self.mas_referencia
-        for ma in mas_necessarias:
+        for ma in self._mas_necessarias:
             if ma not in atual or ma not in anterior:
-                return None, None
+                return None, None, False
         
-        ma_principal_atual = atual[self.ma_principal]
+        # Atributos usados várias vezes ficam em variáveis locais
+        ma_principal = self.ma_principal
+        refs = self._ma_ref_names
+        ma_principal_atual = atual[ma_principal]
+        ma_principal_anterior = anterior[ma_principal]
+        refs_atual = np.array([atual[ma_ref] for ma_ref in refs])
+        refs_anterior = np.array([anterior[ma_ref] for ma_ref in refs])
         
         # CRUZAMENTO DE ALTA: MA_principal deve estar X% ACIMA de TODAS as MAs de referência
-        cruzamento_alta_forte = True
-        for ma_ref in self.mas_referencia:
-            limite_superior = atual[ma_ref] * (1 + FORCA_MINIMA_CRUZAMENTO)
-            if ma_principal_atual <= limite_superior:
-                cruzamento_alta_forte = False
-                break
-        
-        # CRUZAMENTO DE BAIXA: MA_principal deve estar X% ABAIXO de TODAS as MAs de referência  
-        cruzamento_baixa_forte = True
-        for ma_ref in self.mas_referencia:
-            limite_inferior = atual[ma_ref] * (1 - FORCA_MINIMA_CRUZAMENTO)
-            if ma_principal_atual >= limite_inferior:
-                cruzamento_baixa_forte = False
-                break
+        # CRUZAMENTO DE BAIXA: MA_principal deve estar X% ABAIXO de TODAS as MAs de referência
+        acima = ma_principal_atual > refs_atual * _FATOR_ALTA
+        abaixo = ma_principal_atual < refs_atual * _FATOR_BAIXA
+        tem_forca = bool((acima | abaixo).any())
+        cruzamento_alta_forte = bool(acima.all())
+        cruzamento_baixa_forte = bool(abaixo.all())
+        if not (cruzamento_alta_forte or cruzamento_baixa_forte):
+            return False, False, tem_forca
         
         # Verifica se houve CRUZAMENTO (mudança de posição entre anterior e atual)
-        if cruzamento_alta_forte:
-            cruzou_de_fato = any(
-                anterior[self.ma_principal] <= anterior[ma_ref] 
-                for ma_ref in self.mas_referencia
-            )
-            cruzamento_alta_forte = cruzou_de_fato
-        
-        if cruzamento_baixa_forte:
-            cruzou_de_fato = any(
-                anterior[self.ma_principal] >= anterior[ma_ref] 
-                for ma_ref in self.mas_referencia
-            )
-            cruzamento_baixa_forte = cruzou_de_fato
+        cruzamento_alta_forte = cruzamento_alta_forte and bool((ma_principal_anterior <= refs_anterior).any())
+        cruzamento_baixa_forte = cruzamento_baixa_forte and bool((ma_principal_anterior >= refs_anterior).any())
         
-        return cruzamento_alta_forte, cruzamento_baixa_forte
+        return cruzamento_alta_forte, cruzamento_baixa_forte, tem_forca
 
     def verificar_cruzamento(self, moeda: str) -> Optional[Dict[str, Any]]:
         """Verifica cruzamentos de médias"""
         dados = self.buscar_dados(moeda)
-        if dados is None or len(dados) < max(PERIODOS_MA.values()):
+        if dados is None:
+            return None
+        
+        closes, open_time_ms = dados
+        medias = self.calcular_medias(closes)
+        if medias is None:
             return None
-            
-        dados_recentes = self.calcular_medias(dados)
-        atual = dados_recentes.iloc[-1]
         
-        cruzamento_alta, cruzamento_baixa = self.detectar_cruzamento(dados_recentes)
+        anterior, atual = medias
+        
+        cruzamento_alta, cruzamento_baixa, tem_forca = self.detectar_cruzamento(anterior, atual)
         
         # Controle de alertas repetidos
-        chave_alerta = f"{moeda}_{TIMEFRAME}"
+        chave_alerta = f"{moeda}_{self.cfg.timeframe}"
+        alertas_ativos = self.alertas_ativos
         
-        # Reset do alerta se as condições mudaram
-        if chave_alerta in self.alertas_ativos:
-            ma_principal_atual = atual[self.ma_principal]
-            tem_forca = False
-            
-            for ma_ref in self.mas_referencia:
-                if ma_ref in atual:
-                    limite_superior = atual[ma_ref] * (1 + FORCA_MINIMA_CRUZAMENTO)
-                    limite_inferior = atual[ma_ref] * (1 - FORCA_MINIMA_CRUZAMENTO)
-                    
-                    if (ma_principal_atual > limite_superior or ma_principal_atual < limite_inferior):
-                        tem_forca = True
-                        break
-            
-            if not tem_forca:
-                del self.alertas_ativos[chave_alerta]
+        # Reset do alerta quando a MA principal perde a força (calculada em detectar_cruzamento)
+        if not tem_forca:
+            alertas_ativos.pop(chave_alerta, None)
         
         # Só alerta se detectou cruzamento E não alertou recentemente
-        if (cruzamento_alta or cruzamento_baixa) and chave_alerta not in self.alertas_ativos:
-            self.alertas_ativos[chave_alerta] = {
-                'tipo': 'alta' if cruzamento_alta else 'baixa',
-                'timestamp': datetime.now()
-            }
+        agora = time.monotonic()
+        expira = alertas_ativos.get(chave_alerta)
+        if (cruzamento_alta or cruzamento_baixa) and (expira is None or expira <= agora):
+            alertas_ativos[chave_alerta] = agora + ALERTA_TTL
             
             resultado = {
                 'moeda': moeda,
-                'preco': atual['close'],
+                'preco': float(closes[-1]),
                 'cruzamento_alta': cruzamento_alta,
                 'cruzamento_baixa': cruzamento_baixa,
-                'timestamp': atual['timestamp']
+                # Horário do candle só é convertido quando há alerta
+                'timestamp': datetime.fromtimestamp(open_time_ms / 1000, timezone.utc).replace(tzinfo=None)
             }
             
             # Adiciona todas as MAs ao resultado
-            for nome in PERIODOS_MA.keys():
+            for nome in _NOMES_MA:
                 resultado[nome.lower()] = atual[nome]
             
             # Envia notificação Telegram
@@ -232,30 +378,32 @@ class MonitorBinanceFutures:
 
     def mostrar_alertas(self, resultados: List[Dict[str, Any]]) -> None:
         """Exibe alertas formatados - otimizado para Railway"""
-        timestamp = datetime.now().strftime('%H:%M:%S')
+        timestamp = time.strftime('%H:%M:%S')
         
         alertas_encontrados = [r for r in resultados if r is not None]
         
         if alertas_encontrados:
-            print(f"\n{'='*60}")
-            print(f"🚨 ALERTAS DETECTADOS | {timestamp}")
-            print(f"📈 Estratégia: {self.estrategia['descricao']}")
-            print("="*60)
+            # Monta o bloco inteiro e escreve de uma vez (um write por ciclo em vez de um por linha)
+            decimais = FORMATO_PRECO['decimais']
+            linhas = [
+                f"\n{'='*60}",
+                f"🚨 ALERTAS DETECTADOS | {timestamp}",
+                f"📈 Estratégia: {self.estrategia['descricao']}",
+                "="*60,
+            ]
             
             for r in alertas_encontrados:
                 tipo = "ALTA" if r['cruzamento_alta'] else "BAIXA"
                 emoji = SIMBOLOS['alta'] if r['cruzamento_alta'] else SIMBOLOS['baixa']
                 
-                print(f"\n{emoji} {tipo}: {r['moeda']} | Preço: ${r['preco']:.{FORMATO_PRECO['decimais']}f}")
-                print(f"   Horário: {r['timestamp']}")
+                linhas.append(f"\n{emoji} {tipo}: {r['moeda']} | Preço: ${r['preco']:.{decimais}f}")
+                linhas.append(f"   Horário: {r['timestamp']}")
                 
                 # MAs info
-                mas_info = []
-                mas_ordenadas = sorted(PERIODOS_MA.items(), key=lambda x: x[1])
-                for nome, periodo in mas_ordenadas:
-                    valor = r[nome.lower()]
-                    mas_info.append(f"{nome}: {valor:.{FORMATO_PRECO['decimais']}f}")
-                print(f"   {' | '.join(mas_info)}")
+                mas_info = [f"{nome}: {r[nome.lower()]:.{decimais}f}" for nome, periodo in _MAS_ORDENADAS]
+                linhas.append(f"   {' | '.join(mas_info)}")
+            
+            print('\n'.join(linhas))
         else:
             # Log mais limpo para Railway
             ativos = len(self.alertas_ativos)
@@ -267,37 +415,56 @@ class MonitorBinanceFutures:
     def executar_verificacao(self) -> None:
         """Executa verificação paralela com timeout"""
         try:
-            with ThreadPoolExecutor(max_workers=len(MOEDAS)) as executor:
-                futures = {executor.submit(self.verificar_cruzamento, moeda): moeda for moeda in MOEDAS}
-                resultados = []
-                
-                for future in futures:
+            # Só vale a pena buscar o lote se já houver cache (no primeiro ciclo todas vão a /klines)
+            self.precos_lote = self.buscar_ultimos_precos_all() if self.close_cache else {}
+            
+            self.ciclos += 1
+            if self.ciclos % _CICLOS_VARREDURA_ALERTAS == 0:
+                # Remove no próprio dict: workers ainda em andamento guardam referência a ele
+                agora = time.monotonic()
+                alertas_ativos = self.alertas_ativos
+                # list() copia os itens numa chamada C, sem iterar o dict enquanto ele muda
+                for chave, expira in list(alertas_ativos.items()):
+                    if expira <= agora:
+                        alertas_ativos.pop(chave, None)
+            
+            futures = {self.executor.submit(self.verificar_cruzamento, moeda): moeda for moeda in self.cfg.moedas}
+            resultados = []
+            
+            # Processa na ordem de conclusão: uma moeda lenta não segura as demais.
+            # Prazo único para o ciclo inteiro em vez de 30s por future
+            try:
+                for future in as_completed(futures, timeout=self.cfg.intervalo_verificacao):
                     try:
-                        resultado = future.result(timeout=30)
-                        resultados.append(resultado)
+                        resultados.append(future.result())
                     except Exception as e:
                         moeda = futures[future]
-                        logging.error(f"Erro ao processar {moeda}: {e}")
-                        resultados.append(None)
-                
-                self.mostrar_alertas(resultados)
+                        logging.error(f"Erro ao processar {moeda}: {e}", exc_info=_log_detalhado())
+            except FuturesTimeoutError:  # builtin TimeoutError só a partir do 3.11
+                pendentes = [moeda for future, moeda in futures.items() if not future.done()]
+                logging.error(f"Timeout no ciclo, sem resposta de: {', '.join(pendentes)}")
+            
+            self.mostrar_alertas(resultados)
                 
         except Exception as e:
-            logging.error(f"Erro na verificação: {e}")
+            logging.error(f"Erro na verificação: {e}", exc_info=_log_detalhado())
 
     def iniciar_monitoramento(self) -> None:
         """Inicia o loop de monitoramento - versão Railway"""
-        print("\033[1m" + "="*60)
-        print(f"🚀 MONITOR ONLINE - FUTUROS BINANCE")
-        print("="*60 + "\033[0m")
-        print(f"📈 Moedas: {', '.join(MOEDAS)}")
-        print(f"⏱️  Timeframe: {TIMEFRAME}")
-        print(f"🔄 Intervalo: {INTERVALO_VERIFICACAO} segundos")
-        print(f"📏 Força mínima: {FORCA_MINIMA_CRUZAMENTO*100:.1f}%")
-        print(f"🎯 Estratégia: {self.estrategia['descricao']}")
-        print(f"📊 MAs: {dict(PERIODOS_MA)}")
-        print(f"🤖 Telegram: {'✅ Ativo' if self.telegram else '❌ Inativo'}")
-        print("\n🌐 Monitor rodando na nuvem...\n")
+        cfg = self.cfg
+        print('\n'.join((
+            "\033[1m" + "="*60,
+            "🚀 MONITOR ONLINE - FUTUROS BINANCE",
+            "="*60 + "\033[0m",
+            f"📈 Moedas: {', '.join(cfg.moedas)}",
+            f"⏱️  Timeframe: {cfg.timeframe}",
+            f"🔄 Intervalo: {cfg.intervalo_verificacao} segundos",
+            f"📏 Força mínima: {cfg.forca_minima_cruzamento*100:.1f}%",
+            f"🎯 Estratégia: {self.estrategia['descricao']}",
+            f"📊 MAs: {dict(cfg.periodos_ma)}",
+            f"🤖 Telegram: {'✅ Ativo' if self.telegram else '❌ Inativo'}",
+            "\n🌐 Monitor rodando na nuvem...\n",
+        )))
         
         tentativas_erro = 0
         max_tentativas = 5
@@ -305,14 +472,19 @@ class MonitorBinanceFutures:
         try:
             while self.running:
                 try:
-                    inicio = time.time()
+                    inicio = time.monotonic()
                     self.executar_verificacao()
                     
                     # Reset contador de erros
                     tentativas_erro = 0
                     
-                    tempo_execucao = time.time() - inicio
-                    tempo_espera = max(0, INTERVALO_VERIFICACAO - tempo_execucao)
+                    tempo_execucao = time.monotonic() - inicio
+                    tempo_espera = max(0, cfg.intervalo_verificacao - tempo_execucao)
+                    if TIMEFRAME_MS:
+                        # Se o candle fecha antes do próximo ciclo, acorda logo após o fechamento
+                        agora_ms = time.time() * 1000
+                        proximo_fechamento = (agora_ms // TIMEFRAME_MS + 1) * TIMEFRAME_MS
+                        tempo_espera = min(tempo_espera, (proximo_fechamento + _MARGEM_FECHAMENTO_MS - agora_ms) / 1000)
                     
                     # Sleep simples para Railway (sem contagem regressiva)
                     if tempo_espera > 0 and self.running:
@@ -321,7 +493,7 @@ class MonitorBinanceFutures:
                     
                 except Exception as e:
                     tentativas_erro += 1
-                    logging.error(f"Erro na execução ({tentativas_erro}/{max_tentativas}): {e}")
+                    logging.error(f"Erro na execução ({tentativas_erro}/{max_tentativas}): {e}", exc_info=_log_detalhado())
                     
                     if tentativas_erro >= max_tentativas:
                         logging.critical("Muitos erros consecutivos. Reiniciando...")
@@ -332,10 +504,23 @@ class MonitorBinanceFutures:
         except KeyboardInterrupt:
             pass
         finally:
-            print(f"\n🛑 Monitor encerrado")
-            print(f"📊 Resumo:")
-            print(f"   • Estratégia: {self.estrategia['descricao']}")
-            if self.alertas_ativos:
-                print(f"   • Alertas gerados: {len(self.alertas_ativos)}")
-            else:
-                print("   • Nenhum alerta gerado")
\ No newline at end of file
+            self._mostrar_resumo_final()
+
+    def _mostrar_resumo_final(self) -> None:
+        """Libera o pool de threads e as conexões e exibe o resumo do encerramento"""
+        # Sem esperar requisições em andamento: o SIGTERM do Fly.io tem prazo curto
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+        if self.telegram:
+            self.telegram.fechar()
+        linhas = [
+            "\n🛑 Monitor encerrado",
+            "📊 Resumo:",
+            f"   • Estratégia: {self.estrategia['descricao']}",
+            f"   • Tempo em execução: {timedelta(seconds=int(time.monotonic() - self.t0))}",
+        ]
+        if self.alertas_ativos:
+            linhas.append(f"   • Alertas gerados: {len(self.alertas_ativos)}")
+        else:
+            linhas.append("   • Nenhum alerta gerado")
+        print('\n'.join(linhas))
@@ -1,7 +1,72 @@
 # telegram_notifier.py - Notificações com formatação normal
 import requests
-from typing import Dict, Any
-from config import FORCA_MINIMA_CRUZAMENTO, TIMEFRAME
+import hashlib
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from typing import Dict, Any, Tuple
+from config import FORCA_MINIMA_CRUZAMENTO, TIMEFRAME, get_estrategia_info
+
+try:
+    import orjson
+except ImportError:  # fallback para json da stdlib
+    orjson = None
+
+# Mensagem com formatação normal (sem markdown), preenchida a cada alerta
+_TEMPLATE_ALERTA = """{emoji} {moeda} - {tipo}
+
+💰 Preço: ${preco:.4f}
+📊 Força: {forca:.1f}% ({forca_desc})
+📏 Mínimo: {minimo:.1f}%
+⏰ Horário: {hora} ({timeframe})
+
+🚀 AÇÃO: {acao} AGORA!"""
+
+# (emoji, tipo, ação) por direção do cruzamento (chave: cruzamento_alta)
+_DIRECAO = {True: ("🟢", "ALTA", "LONG"), False: ("🔴", "BAIXA", "SHORT")}
+
+# Força mínima exigida (%) e limites da classificação, fixos durante o processo
+_MINIMO_EXIGIDO = FORCA_MINIMA_CRUZAMENTO * 100
+_LIMITE_MUITO_FORTE = _MINIMO_EXIGIDO * 2
+_LIMITE_FORTE = _MINIMO_EXIGIDO * 1.5
+
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Helpers de JSON compartilhados (monitor e main importam daqui)
+def ler_json(response: requests.Response) -> Any:
+    """Decodifica o corpo JSON da resposta (orjson quando disponível)"""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+def json_bytes(obj: Any) -> bytes:
+    """Serializa para JSON já em bytes (orjson quando disponível)"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+def _corpo_json(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Argumentos de corpo JSON para o POST"""
+    return {'data': json_bytes(payload), 'headers': _JSON_HEADERS}
+
+# Segundos em que o mesmo alerta (moeda + direção) não é enfileirado de novo
+JANELA_DUPLICADOS = 60
+
+# Validade (segundos) de um getMe bem-sucedido; reinícios dentro da janela não refazem o teste.
+# Cache em memória por processo e num arquivo em /tmp (mtime) compartilhado entre processos
+GETME_CACHE_TTL = 3600
+_TOKEN_OK_CACHE: Dict[str, float] = {}
+
+def _chave_token(bot_token: str) -> str:
+    """Identificador estável do token (sem expor o token no nome do arquivo)"""
+    return hashlib.sha256(bot_token.encode()).hexdigest()[:16]
+
+def _arquivo_token_ok(chave: str) -> str:
+    """Arquivo cujo mtime marca a última validação do token"""
+    return os.path.join(tempfile.gettempdir(), f"tg_ok_{chave}")
 
 class TelegramNotifier:
     def __init__(self, bot_token: str, chat_id: str):
@@ -9,78 +74,133 @@ class TelegramNotifier:
         self.chat_id = chat_id
         self.url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
         
+        # MAs da estratégia, nas chaves minúsculas usadas pelo monitor no resultado
+        estrategia = get_estrategia_info()
+        self._ma_principal = estrategia['ma_principal'].lower()
+        self._mas_referencia = tuple(ma.lower() for ma in estrategia['mas_referencia'])
+        
+        # Sessão persistente: getMe e os alertas reaproveitam a mesma conexão TLS
+        self.session = requests.Session()
+        
+        # Envio em segundo plano: as threads do monitor só enfileiram o alerta
+        self._fila: queue.Queue = queue.Queue()
+        self._recentes: Dict[Tuple[str, bool], float] = {}
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._consumir_fila, name='telegram', daemon=True)
+        self._worker.start()
+        
         # Testa conexão na inicialização
         print("🤖 Testando conexão Telegram...")
-        if self._testar_conexao():
+        if self._conexao_ok():
             print("✅ Telegram conectado!")
         else:
             print("❌ Erro na conexão Telegram")
 
+    def _conexao_ok(self) -> bool:
+        """getMe com cache: só chama a API se o token não foi validado na última hora"""
+        chave = _chave_token(self.bot_token)
+        arquivo = _arquivo_token_ok(chave)
+        agora = time.time()
+        
+        validado_em = _TOKEN_OK_CACHE.get(chave)
+        if validado_em is None:
+            try:
+                validado_em = os.path.getmtime(arquivo)
+            except OSError:
+                validado_em = 0.0
+        if agora - validado_em < GETME_CACHE_TTL:
+            return True
+        
+        if not self._testar_conexao():
+            return False
+        
+        _TOKEN_OK_CACHE[chave] = agora
+        try:
+            with open(arquivo, 'a'):
+                os.utime(arquivo, (agora, agora))
+        except OSError:
+            pass  # sem /tmp gravável o cache fica só em memória
+        return True
+
     def _testar_conexao(self) -> bool:
         """Testa se o bot está funcionando"""
         try:
             url = f"https://api.telegram.org/bot{self.bot_token}/getMe"
-            response = requests.get(url, timeout=5)
-            return response.status_code == 200 and response.json().get('ok', False)
+            response = self.session.get(url, timeout=5)
+            return response.status_code == 200 and ler_json(response).get('ok', False)
         except:
             return False
 
     def _calcular_forca_real(self, resultado: Dict[str, Any]) -> float:
         """Calcula a força real do cruzamento"""
-        ma7 = resultado.get('ma_7', 0)
-        ma25 = resultado.get('ma_25', 0)
-        ma99 = resultado.get('ma_99', 0)
-        
-        if ma25 == 0 or ma99 == 0:
-            return 0
+        principal = resultado.get(self._ma_principal, 0.0)
+        forca = None
         
-        # Calcula distância percentual da MA7 para cada MA de referência
-        forca_vs_ma25 = abs((ma7 - ma25) / ma25) * 100
-        forca_vs_ma99 = abs((ma7 - ma99) / ma99) * 100
+        # Distância percentual da MA principal para cada MA de referência
+        for chave in self._mas_referencia:
+            ref = resultado.get(chave, 0.0)
+            if not ref:
+                return 0.0
+            distancia = abs(principal - ref) * 100.0 / ref
+            
+            # A força real é a MENOR distância (gargalo)
+            if forca is None or distancia < forca:
+                forca = distancia
         
-        # A força real é a MENOR distância (gargalo)
-        return min(forca_vs_ma25, forca_vs_ma99)
+        return forca or 0.0
 
     def enviar_alerta(self, resultado: Dict[str, Any]) -> bool:
+        """Enfileira o alerta para envio; False se o mesmo alerta saiu há pouco"""
+        chave = (resultado['moeda'], bool(resultado['cruzamento_alta']))
+        agora = time.monotonic()
+        with self._lock:
+            if agora - self._recentes.get(chave, float('-inf')) < JANELA_DUPLICADOS:
+                return False
+            self._recentes[chave] = agora
+        
+        self._fila.put(resultado)
+        return True
+
+    def fechar(self, timeout: float = 5.0) -> None:
+        """Envia o que ainda estiver na fila (até timeout) e libera a sessão"""
+        self._fila.put(None)
+        self._worker.join(timeout)
+        self.session.close()
+
+    def _consumir_fila(self) -> None:
+        """Thread de envio: consome a fila até receber None"""
+        while True:
+            resultado = self._fila.get()
+            if resultado is None:
+                break
+            self._enviar(resultado)
+
+    def _enviar(self, resultado: Dict[str, Any]) -> bool:
         """Envia alerta de cruzamento para o Telegram"""
         try:
             # Calcula força real
             forca_real = self._calcular_forca_real(resultado)
-            minimo_exigido = FORCA_MINIMA_CRUZAMENTO * 100
-            
-            # Determina tipo e emoji
-            if resultado['cruzamento_alta']:
-                emoji = "🟢"
-                tipo = "ALTA"
-                acao = "LONG"
-            else:
-                emoji = "🔴"
-                tipo = "BAIXA"
-                acao = "SHORT"
+            emoji, tipo, acao = _DIRECAO[bool(resultado['cruzamento_alta'])]
             
             # Classificação da força
-            if forca_real >= minimo_exigido * 2:
+            if forca_real >= _LIMITE_MUITO_FORTE:
                 forca_desc = "MUITO FORTE ✅"
-            elif forca_real >= minimo_exigido * 1.5:
+            elif forca_real >= _LIMITE_FORTE:
                 forca_desc = "FORTE ✅"
             else:
                 forca_desc = "VÁLIDO ✅"
             
-            # Mensagem com formatação normal (sem markdown)
-            mensagem = f"""{emoji} {resultado['moeda']} - {tipo}
-
-💰 Preço: ${resultado['preco']:.4f}
-📊 Força: {forca_real:.1f}% ({forca_desc})
-📏 Mínimo: {minimo_exigido:.1f}%
-⏰ Horário: {resultado['timestamp'].strftime('%H:%M')} ({TIMEFRAME})
-
-🚀 AÇÃO: {acao} AGORA!"""
+            mensagem = _TEMPLATE_ALERTA.format(
+                emoji=emoji, moeda=resultado['moeda'], tipo=tipo,
+                preco=resultado['preco'], forca=forca_real, forca_desc=forca_desc,
+                minimo=_MINIMO_EXIGIDO, hora=resultado['timestamp'].strftime('%H:%M'),
+                timeframe=TIMEFRAME, acao=acao
+            )
             
             # Envia mensagem sem parse_mode (formatação normal)
-            response = requests.post(self.url, json={
-                'chat_id': self.chat_id,
-                'text': mensagem
-            }, timeout=10)
+            response = self.session.post(
+                self.url, timeout=10, **_corpo_json({'chat_id': self.chat_id, 'text': mensagem})
+            )
             
             sucesso = response.status_code == 200
             